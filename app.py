@@ -4,90 +4,247 @@ Flask application with file upload, real-time progress via SSE.
 """
 
 import os
-import json
+import re
 import time
 import queue
+import shutil
 import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import orjson
+from cachetools import TTLCache
 from flask import Flask, render_template, request, jsonify, Response, send_file
 import requests as http_requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from scraper import scrape_postcodes, create_excel, load_existing_excel
 
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50 MB max upload
+# Let a fronting nginx/Apache serve downloads via X-Sendfile when configured for it
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(STATIC_DIR, exist_ok=True)
 
-# Global state
-jobs = {}
-uploaded_data = {}  # session_id -> { stores: [...], keys: set(), filename: str }
+STATE_TTL = 2 * 3600  # seconds a job/upload is kept in memory
+STATE_MAXSIZE = 128
+SWEEP_INTERVAL = 60
+
+
+class SPSCQueue:
+    """
+    Single-producer/single-consumer queue for job progress messages.
+    drain() blocks until something is available, then removes and returns
+    every pending message as a list.
+    """
+
+    def __init__(self, maxlen=4096):
+        self._items = deque(maxlen=maxlen)
+        self._ready = threading.Event()
+
+    def put(self, item):
+        self._items.append(item)
+        self._ready.set()
+
+    def drain(self, timeout=None):
+        if not self._items:
+            self._ready.clear()
+            # Re-check after clearing so a put() in between isn't missed
+            if not self._items and not self._ready.wait(timeout):
+                raise queue.Empty
+        return self.drain_nowait()
+
+    def drain_nowait(self):
+        items = []
+        popleft = self._items.popleft
+        while True:
+            try:
+                items.append(popleft())
+            except IndexError:
+                break
+        if not items:
+            raise queue.Empty
+        return items
+
+
+def _release_entry(entry):
+    """Delete the file held by an evicted job/upload entry."""
+    filepath = entry.get("filepath")
+    if filepath and os.path.exists(filepath):
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+
 
+class _StateCache(TTLCache):
+    """TTLCache that deletes the files of entries it evicts."""
+
+    def popitem(self):
+        key, value = super().popitem()
+        _release_entry(value)
+        return key, value
+
+    def expire(self, time=None):
+        # cachetools >= 5.5 returns the expired (key, value) pairs
+        expired = super().expire(time)
+        for _, value in expired:
+            _release_entry(value)
+        return expired
+
+
+# Global state — guard every access with state_lock (TTLCache is not thread-safe).
+# Running jobs live in running_jobs, which is never evicted, and move into the
+# jobs cache once they finish.
+state_lock = threading.RLock()
+running_jobs = {}
+jobs = _StateCache(maxsize=STATE_MAXSIZE, ttl=STATE_TTL)
+uploaded_data = _StateCache(maxsize=STATE_MAXSIZE, ttl=STATE_TTL)  # session_id -> { status: str, stores: [...], keys: frozenset, filename: str, queue: Queue }
+
+
+def _sweep_state():
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        with state_lock:
+            jobs.expire()
+            uploaded_data.expire()
+
+
+threading.Thread(target=_sweep_state, daemon=True).start()
+
+# Shared HTTP session for postcodes.io — keeps connections alive between lookups
+SESSION = http_requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504)),
+))
+SESSION.headers.update({"User-Agent": "GoDapper/1.0"})
+HTTP_TIMEOUT = (3, 10)  # (connect, read) seconds
+POSTCODE_CACHE_TTL = 6 * 3600  # seconds a location lookup is reused
+
+_OUTCODE_RE = re.compile(r"([A-Z]+)(\d+)?")
+_OUTCODE_INPUT_RE = re.compile(r"[A-Z]{1,2}\d[A-Z\d]?")
+
+
+def _sse_frame(msg):
+    return b"data: " + orjson.dumps(msg) + b"\n\n"
+
+
+HEARTBEAT_FRAME = _sse_frame({"type": "heartbeat"})
+STORE_BATCH_WINDOW = 0.05  # seconds to wait for more stores before flushing a batch
+STORE_BATCH_MAX = 50
 
-def fetch_postcodes_for_location(location):
-    results = []
-    seen = set()
 
+def _fetch_nearby_outcodes(lat, lon):
+    """Outcodes near a point, or None if the lookup failed."""
     try:
-        resp = http_requests.get(
-            f"https://api.postcodes.io/places?q={location}&limit=5", timeout=10
+        resp = SESSION.get(
+            f"https://api.postcodes.io/outcodes?lon={lon}&lat={lat}&limit=100&radius=25000",
+            timeout=HTTP_TIMEOUT,
         )
-        if resp.status_code == 200:
-            data = resp.json()
-            places = data.get("result", []) or []
-            for place in places:
-                lat = place.get("latitude")
-                lon = place.get("longitude")
-                if lat and lon:
-                    resp2 = http_requests.get(
-                        f"https://api.postcodes.io/outcodes?lon={lon}&lat={lat}&limit=100&radius=25000",
-                        timeout=10,
-                    )
-                    if resp2.status_code == 200:
-                        outcodes = resp2.json().get("result", []) or []
-                        for oc in outcodes:
-                            outcode = oc.get("outcode", "")
-                            if outcode and outcode not in seen:
-                                seen.add(outcode)
-                                results.append({
-                                    "outcode": outcode,
-                                    "admin_district": ", ".join(oc.get("admin_district", []) or []),
-                                    "latitude": oc.get("latitude"),
-                                    "longitude": oc.get("longitude"),
-                                })
+        if resp.status_code != 200:
+            return None
+        return resp.json().get("result", []) or []
     except Exception as e:
-        print(f"Place search error: {e}")
+        print(f"Nearby outcode lookup error: {e}")
+        return None
+
+
+def _outcode_entry(oc):
+    return {
+        "outcode": oc.get("outcode", ""),
+        "admin_district": ", ".join(oc.get("admin_district", []) or []),
+        "latitude": oc.get("latitude"),
+        "longitude": oc.get("longitude"),
+    }
 
+
+def fetch_postcodes_for_location(location):
+    """
+    Returns (outcodes, complete). complete is False when the place search or
+    any nearby-outcode lookup failed, so outcodes may be missing.
+    """
+    results = []
+    seen = set()
+    complete = True
+
+    # Input that already looks like an outcode (e.g. "SW1", "L17") skips the place search
     location_upper = location.strip().upper()
-    if len(location_upper) <= 4 and location_upper[0].isalpha():
+    if _OUTCODE_INPUT_RE.fullmatch(location_upper):
         try:
-            resp = http_requests.get(
-                f"https://api.postcodes.io/outcodes/{location_upper}", timeout=10
+            resp = SESSION.get(
+                f"https://api.postcodes.io/outcodes/{location_upper}", timeout=HTTP_TIMEOUT
             )
             if resp.status_code == 200:
-                oc = resp.json().get("result", {})
-                outcode = oc.get("outcode", "")
-                if outcode and outcode not in seen:
-                    seen.add(outcode)
-                    results.append({
-                        "outcode": outcode,
-                        "admin_district": ", ".join(oc.get("admin_district", []) or []),
-                        "latitude": oc.get("latitude"),
-                        "longitude": oc.get("longitude"),
-                    })
+                oc = resp.json().get("result", {}) or {}
+                if oc.get("outcode"):
+                    return [_outcode_entry(oc)], True
         except Exception:
             pass
 
+    try:
+        resp = SESSION.get(
+            f"https://api.postcodes.io/places?q={location}&limit=5", timeout=HTTP_TIMEOUT
+        )
+        if resp.status_code != 200:
+            complete = False
+        else:
+            data = resp.json()
+            places = data.get("result", []) or []
+            coords = [
+                (place.get("latitude"), place.get("longitude"))
+                for place in places
+                if place.get("latitude") and place.get("longitude")
+            ]
+            # Nearby-outcode lookups are independent — run them concurrently
+            with ThreadPoolExecutor(max_workers=5) as pool:
+                outcode_lists = list(pool.map(lambda c: _fetch_nearby_outcodes(*c), coords))
+            for outcodes in outcode_lists:
+                if outcodes is None:
+                    complete = False
+                    continue  # keep what the other lookups found
+                for oc in outcodes:
+                    outcode = oc.get("outcode", "")
+                    if outcode and outcode not in seen:
+                        seen.add(outcode)
+                        results.append(_outcode_entry(oc))
+    except Exception as e:
+        print(f"Place search error: {e}")
+        complete = False
+
     def sort_key(x):
-        oc = x["outcode"]
-        alpha = "".join(c for c in oc if c.isalpha())
-        num = "".join(c for c in oc if c.isdigit())
-        return (alpha, int(num) if num else 0)
+        m = _OUTCODE_RE.match(x["outcode"])
+        if not m:
+            return ("", 0)
+        return (m.group(1), int(m.group(2)) if m.group(2) else 0)
 
     results.sort(key=sort_key)
+    return results, complete
+
+
+# Normalised location -> outcodes. Only complete, non-empty lookups are stored,
+# so a transient postcodes.io failure is never served from cache.
+postcode_cache = TTLCache(maxsize=512, ttl=POSTCODE_CACHE_TTL)
+postcode_cache_lock = threading.Lock()
+
+
+def _fetch_postcodes_cached(location_norm):
+    with postcode_cache_lock:
+        results = postcode_cache.get(location_norm)
+    if results is None:
+        results, complete = fetch_postcodes_for_location(location_norm)
+        if results and complete:
+            with postcode_cache_lock:
+                postcode_cache[location_norm] = results
     return results
 
 
@@ -102,13 +259,17 @@ def get_postcodes():
     location = data.get("location", "").strip()
     if not location:
         return jsonify({"error": "Location is required"}), 400
-    postcodes = fetch_postcodes_for_location(location)
+    postcodes = _fetch_postcodes_cached(location.lower())
     return jsonify({"postcodes": postcodes, "location": location})
 
 
 @app.route("/api/upload", methods=["POST"])
 def upload_file():
-    """Upload an existing Excel file. Parse it and return store count + session ID."""
+    """Upload an existing Excel file. Returns a session ID; parse results stream from /api/upload/progress."""
+    max_len = app.config["MAX_CONTENT_LENGTH"]
+    if request.content_length and request.content_length > max_len:
+        return jsonify({"error": f"File too large (max {max_len // (1024 * 1024)} MB)"}), 413
+
     if "file" not in request.files:
         return jsonify({"error": "No file uploaded"}), 400
 
@@ -121,40 +282,81 @@ def upload_file():
         return jsonify({"error": "Only .xlsx or .xls files are supported"}), 400
 
     # Save to uploads dir
-    session_id = f"upload_{int(time.time() * 1000)}"
+    session_id = f"upload_{uuid.uuid4().hex}"
     save_path = os.path.join(UPLOAD_DIR, f"{session_id}{ext}")
-    file.save(save_path)
+    with open(save_path, "wb") as dst:
+        shutil.copyfileobj(file.stream, dst, length=1024 * 1024)
+
+    # Parse in the background so large files don't hold the request thread
+    upload_queue = queue.Queue()
+    upload_queue.put({"type": "parsing", "filename": file.filename})
+    upload = {
+        "status": "parsing",
+        "stores": [],
+        "keys": frozenset(),
+        "with_phone": 0,
+        "filename": file.filename,
+        "filepath": save_path,
+        "queue": upload_queue,
+    }
+    with state_lock:
+        uploaded_data[session_id] = upload
 
-    # Parse the file
-    stores, keys, error = load_existing_excel(save_path)
+    thread = threading.Thread(target=_parse_upload, args=(session_id, upload), daemon=True)
+    thread.start()
 
-    if error:
-        os.remove(save_path)
-        return jsonify({"error": f"Could not parse file: {error}"}), 400
+    return jsonify({
+        "session_id": session_id,
+        "filename": file.filename,
+        "status": "parsing",
+    })
 
-    # Extract unique postcodes found in the file
-    existing_postcodes = sorted(set(
-        s.get("postcode", "—") for s in stores if s.get("postcode", "—") != "—"
-    ))
+
+def _parse_upload(session_id, upload):
+    """Parse an uploaded file and publish a ready/error event for its session."""
+    save_path = upload["filepath"]
+    upload_queue = upload["queue"]
+
+    try:
+        stores, keys, error = load_existing_excel(save_path)
+    except Exception as e:
+        stores, keys, error = [], set(), str(e)
+
+    if error:
+        if os.path.exists(save_path):
+            os.remove(save_path)
+        upload["status"] = "error"
+        upload_queue.put({"type": "error", "message": f"Could not parse file: {error}"})
+        return
+
+    # Extract unique postcodes and phone count in a single pass
+    found_postcodes = set()
+    add_postcode = found_postcodes.add
+    with_phone = 0
+    for s in stores:
+        pc = s.get("postcode", "—")
+        if pc != "—":
+            add_postcode(pc)
+        if s.get("phone", "N/A") != "N/A":
+            with_phone += 1
+    existing_postcodes = sorted(found_postcodes)
 
     # Store in memory for later use
-    uploaded_data[session_id] = {
-        "stores": stores,
-        "keys": keys,
-        "filename": file.filename,
-        "filepath": save_path,
-    }
+    upload["stores"] = stores
+    upload["keys"] = frozenset(keys)
+    upload["with_phone"] = with_phone
+    upload["status"] = "ready"
 
-    # Return summary (don't send full store data to keep response light)
-    with_phone = sum(1 for s in stores if s.get("phone", "N/A") != "N/A")
+    # Send summary (don't send full store data to keep the event light)
     sample = [
         {"name": s["name"], "address": s["address"], "phone": s["phone"]}
         for s in stores[:5]
     ]
 
-    return jsonify({
+    upload_queue.put({
+        "type": "ready",
         "session_id": session_id,
-        "filename": file.filename,
+        "filename": upload["filename"],
         "total_stores": len(stores),
         "with_phone": with_phone,
         "postcodes_found": existing_postcodes,
@@ -162,16 +364,39 @@ def upload_file():
     })
 
 
+@app.route("/api/upload/progress/<session_id>")
+def stream_upload_progress(session_id):
+    with state_lock:
+        upload = uploaded_data.get(session_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
+
+    q = upload["queue"]
+
+    def generate():
+        while True:
+            try:
+                msg = q.get(timeout=60)
+                yield _sse_frame(msg)
+                if msg.get("type") in ("ready", "error"):
+                    break
+            except queue.Empty:
+                yield HEARTBEAT_FRAME
+
+    return Response(generate(), mimetype="text/event-stream", direct_passthrough=True)
+
+
 @app.route("/api/upload/remove", methods=["POST"])
 def remove_upload():
     """Remove an uploaded file from memory."""
     data = request.json
     session_id = data.get("session_id", "")
-    if session_id in uploaded_data:
-        filepath = uploaded_data[session_id].get("filepath")
+    with state_lock:
+        upload = uploaded_data.pop(session_id, None)
+    if upload:
+        filepath = upload.get("filepath")
         if filepath and os.path.exists(filepath):
             os.remove(filepath)
-        del uploaded_data[session_id]
     return jsonify({"ok": True})
 
 
@@ -184,6 +409,11 @@ def start_scrape():
     postcodes = data.get("postcodes", [])
     session_id = data.get("upload_session_id", "")
 
+    # Drop blanks and duplicates (keeping order) so no postcode is scraped twice
+    postcodes = list(dict.fromkeys(
+        p.strip().upper() for p in postcodes if isinstance(p, str) and p.strip()
+    ))
+
     if not query:
         return jsonify({"error": "Search query is required"}), 400
     if not postcodes:
@@ -191,20 +421,32 @@ def start_scrape():
 
     # Load existing data if an upload was provided
     existing_stores = []
-    existing_keys = set()
-    if session_id and session_id in uploaded_data:
-        existing_stores = uploaded_data[session_id]["stores"]
-        existing_keys = uploaded_data[session_id]["keys"]
-
-    job_id = f"job_{int(time.time() * 1000)}"
-    progress_queue = queue.Queue()
-
-    jobs[job_id] = {
+    existing_keys = frozenset()
+    existing_with_phone = 0
+    with state_lock:
+        upload = uploaded_data.get(session_id) if session_id else None
+    if session_id and upload is None:
+        return jsonify({"error": "Uploaded file has expired, please re-upload it"}), 410
+    if upload:
+        if upload["status"] == "parsing":
+            return jsonify({"error": "Uploaded file is still being parsed"}), 409
+        if upload["status"] != "ready":
+            return jsonify({"error": "Uploaded file could not be parsed, please re-upload"}), 400
+        existing_stores = upload["stores"]
+        existing_keys = upload["keys"]
+        existing_with_phone = upload["with_phone"]
+
+    job_id = f"job_{uuid.uuid4().hex}"
+    progress_queue = SPSCQueue()
+
+    job = {
         "status": "running",
         "queue": progress_queue,
         "output_file": None,
         "started_at": datetime.now().isoformat(),
     }
+    with state_lock:
+        running_jobs[job_id] = job
 
     if existing_stores:
         progress_queue.put({
@@ -213,6 +455,14 @@ def start_scrape():
         })
 
     def run_scraper():
+        new_with_phone = 0
+
+        def on_store(store):
+            nonlocal new_with_phone
+            if store.get("phone", "N/A") != "N/A":
+                new_with_phone += 1
+            progress_queue.put({"type": "store", "data": store})
+
         try:
             output_file = f"output_{job_id}.xlsx"
             output_path = os.path.join(STATIC_DIR, output_file)
@@ -223,7 +473,7 @@ def start_scrape():
                 postcodes=postcodes,
                 existing_keys=existing_keys,
                 progress_callback=lambda msg: progress_queue.put({"type": "progress", "message": msg}),
-                store_callback=lambda store: progress_queue.put({"type": "store", "data": store}),
+                store_callback=on_store,
             )
 
             # Always create output (even if 0 new — existing stores will be in the file)
@@ -235,7 +485,7 @@ def start_scrape():
                 existing_stores=existing_stores,
             )
 
-            jobs[job_id]["output_file"] = output_path
+            job["output_file"] = output_path
             total_combined = len(existing_stores) + len(new_results)
 
             progress_queue.put({
@@ -243,18 +493,19 @@ def start_scrape():
                 "total_stores": total_combined,
                 "new_stores": len(new_results),
                 "existing_stores": len(existing_stores),
-                "total_with_phone": (
-                    len([s for s in new_results if s.get("phone", "N/A") != "N/A"]) +
-                    len([s for s in existing_stores if s.get("phone", "N/A") != "N/A"])
-                ),
+                "total_with_phone": new_with_phone + existing_with_phone,
                 "file": output_file,
             })
 
-            jobs[job_id]["status"] = "complete"
+            job["status"] = "complete"
 
         except Exception as e:
             progress_queue.put({"type": "error", "message": str(e)})
-            jobs[job_id]["status"] = "error"
+            job["status"] = "error"
+        finally:
+            with state_lock:
+                running_jobs.pop(job_id, None)
+                jobs[job_id] = job
 
     thread = threading.Thread(target=run_scraper, daemon=True)
     thread.start()
@@ -264,28 +515,68 @@ def start_scrape():
 
 @app.route("/api/progress/<job_id>")
 def stream_progress(job_id):
-    if job_id not in jobs:
+    with state_lock:
+        job = running_jobs.get(job_id) or jobs.get(job_id)
+    if job is None:
         return jsonify({"error": "Job not found"}), 404
 
+    q = job["queue"]
+
+    def stores_frame(batch):
+        return _sse_frame({"type": "stores", "data": batch})
+
     def generate():
-        q = jobs[job_id]["queue"]
         while True:
             try:
-                msg = q.get(timeout=60)
-                yield f"data: {json.dumps(msg)}\n\n"
-                if msg.get("type") in ("complete", "error"):
-                    break
+                msgs = q.drain(timeout=60)
             except queue.Empty:
-                yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+                yield HEARTBEAT_FRAME
+                continue
+
+            # Give a burst of stores a short window to accumulate before flushing
+            deadline = time.monotonic() + STORE_BATCH_WINDOW
+            while msgs[-1].get("type") == "store":
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    msgs.extend(q.drain(timeout=remaining))
+                except queue.Empty:
+                    break
 
-    return Response(generate(), mimetype="text/event-stream")
+            # Coalesce consecutive store messages into "stores" frames
+            batch = []
+            for msg in msgs:
+                if msg.get("type") == "store":
+                    batch.append(msg["data"])
+                    if len(batch) >= STORE_BATCH_MAX:
+                        yield stores_frame(batch)
+                        batch = []
+                    continue
+                if batch:
+                    yield stores_frame(batch)
+                    batch = []
+                yield _sse_frame(msg)
+                if msg.get("type") in ("complete", "error"):
+                    return
+            if batch:
+                yield stores_frame(batch)
+
+    return Response(generate(), mimetype="text/event-stream", direct_passthrough=True)
 
 
 @app.route("/api/download/<filename>")
 def download_file(filename):
     filepath = os.path.join(STATIC_DIR, filename)
     if os.path.exists(filepath):
-        return send_file(filepath, as_attachment=True, download_name="scraped_stores.xlsx")
+        return send_file(
+            filepath,
+            mimetype=XLSX_MIMETYPE,
+            as_attachment=True,
+            download_name="scraped_stores.xlsx",
+            conditional=True,
+            etag=True,
+        )
     return jsonify({"error": "File not found"}), 404
 
 
@@ -296,18 +587,19 @@ def cleanup_files():
 
     for dirname, key in [(STATIC_DIR, "static"), (UPLOAD_DIR, "uploads")]:
         if os.path.exists(dirname):
-            for fname in os.listdir(dirname):
-                fpath = os.path.join(dirname, fname)
-                if os.path.isfile(fpath):
-                    try:
-                        os.remove(fpath)
-                        deleted[key] += 1
-                        deleted["files"].append(f"{key}/{fname}")
-                    except Exception:
-                        pass
+            with os.scandir(dirname) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        try:
+                            os.unlink(entry.path)
+                            deleted[key] += 1
+                            deleted["files"].append(f"{key}/{entry.name}")
+                        except Exception:
+                            pass
 
     # Clear in-memory upload data
-    uploaded_data.clear()
+    with state_lock:
+        uploaded_data.clear()
 
     total = deleted["static"] + deleted["uploads"]
     return jsonify({
@@ -327,11 +619,11 @@ def cleanup_info():
 
     for dirname in [STATIC_DIR, UPLOAD_DIR]:
         if os.path.exists(dirname):
-            for fname in os.listdir(dirname):
-                fpath = os.path.join(dirname, fname)
-                if os.path.isfile(fpath):
-                    total_files += 1
-                    total_size += os.path.getsize(fpath)
+            with os.scandir(dirname) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        total_files += 1
+                        total_size += entry.stat(follow_symlinks=False).st_size
 
     return jsonify({
         "total_files": total_files,
@@ -341,5 +633,6 @@ def cleanup_info():
 
 
 if __name__ == "__main__":
+    # Development server only — deploy with gunicorn (see Dockerfile / README)
     port = int(os.environ.get("PORT", 5000))
-    app.run(debug=False, host="0.0.0.0", port=port, threaded=True)
+    app.run(debug=False, host="0.0.0.0", port=port)
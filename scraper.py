@@ -2,163 +2,240 @@
 Supports loading existing Excel data and merging/deduplicating.
 """
 
+import atexit
+import queue
 import re
+import threading
 import time
+from concurrent.futures import Future, as_completed, wait
+from contextlib import closing
+from copy import copy
 from datetime import datetime
+from itertools import islice
 from urllib.parse import quote
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
-SCROLL_PAUSE = 1.5
-DETAIL_PAUSE = 1.0
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+SCROLL_PAUSE = 1.5          # max wait for the results feed to grow after a scroll
+DETAIL_TIMEOUT = 3.0        # max wait for a listing's heading to render
 MAX_SCROLLS = 15
+POOL_SIZE = 4               # long-lived browser workers shared by all scrape jobs
+MAX_USES_PER_CONTEXT = 10   # postcodes scraped before a worker recycles its context
+MAX_JOBS_PER_BROWSER = 25   # scrape jobs a pooled browser serves before it is relaunched
 
 
 # ──────────────────────────────────────────────────────
 # EXISTING FILE LOADER
 # ──────────────────────────────────────────────────────
 
+_DEDUP_STRIP = re.compile(r'[^a-z0-9]')
+
+
 def make_dedup_key(name, address):
     """Create a normalised key for deduplication."""
-    name = re.sub(r'[^a-z0-9]', '', (name or '').lower())
-    address = re.sub(r'[^a-z0-9]', '', (address or '').lower())
-    return f"{name}|{address}"
+    strip = _DEDUP_STRIP.sub
+    return f"{strip('', (name or '').lower())}|{strip('', (address or '').lower())}"
 
 
 def make_dedup_key_from_store(store):
     return make_dedup_key(store.get("name", ""), store.get("address", ""))
 
 
+# (field, kind, default) for every store column read from an uploaded sheet
+_STORE_FIELDS = (
+    ("name", "str", ""),
+    ("address", "str", "N/A"),
+    ("phone", "str", "N/A"),
+    ("rating", "float", "N/A"),
+    ("total_reviews", "int", 0),
+    ("category", "str", "N/A"),
+    ("website", "str", "N/A"),
+    ("opening_hours", "str", "N/A"),
+    ("postcode", "str", "—"),
+    ("latitude", "str", ""),
+    ("longitude", "str", ""),
+    ("google_maps_url", "str", "N/A"),
+)
+
+# Lower-case header spellings recognised for each store field
+_HEADER_ALIASES = {
+    "name": ["store name", "name", "shop name", "business name", "store"],
+    "address": ["address", "formatted address", "location", "full address"],
+    "phone": ["phone", "phone number", "telephone", "tel", "phone no", "contact"],
+    "rating": ["rating", "stars", "google rating"],
+    "total_reviews": ["reviews", "total reviews", "review count", "no of reviews", "ratings count"],
+    "category": ["category", "type", "primary type", "business type", "store type"],
+    "website": ["website", "web", "url", "site", "website url"],
+    "opening_hours": ["opening hours", "hours", "open hours", "timings"],
+    "postcode": ["postcode", "postcode area", "post code", "zip", "outcode"],
+    "latitude": ["latitude", "lat"],
+    "longitude": ["longitude", "lng", "lon", "long"],
+    "google_maps_url": ["google maps url", "google maps", "maps url", "maps link", "google maps link"],
+}
+_ALIAS_TO_FIELD = {
+    alias: field for field, aliases in _HEADER_ALIASES.items() for alias in aliases
+}
+
+
+def _decode_cell(val, kind, default):
+    """Convert a raw cell value to a store field value of the given kind."""
+    if val is None:
+        return default
+    if kind == "str":
+        if isinstance(val, float) and val.is_integer():
+            val = int(val)  # calamine reads every number as float
+        val = str(val).strip()
+        return val if val else default
+    try:
+        return float(val) if kind == "float" else int(float(val))
+    except (ValueError, TypeError):
+        return default
+
+
+def _pick_sheet_name(sheetnames):
+    # Try the first sheet, or one named with "store" in it
+    for name in sheetnames:
+        if "store" in name.lower() or "all" in name.lower():
+            return name
+    return sheetnames[0]
+
+
+def _iter_rows_calamine(filepath):
+    wb = CalamineWorkbook.from_path(filepath)
+    sheet = wb.get_sheet_by_name(_pick_sheet_name(wb.sheet_names))
+    return (row for row in sheet.iter_rows())
+
+
+def _iter_rows_openpyxl(filepath):
+    wb = load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb[_pick_sheet_name(wb.sheetnames)]
+        # Some tools write a bogus <dimension> (e.g. "A1"), which would cut iteration short
+        if (ws.max_row or 0) <= 1:
+            ws.reset_dimensions()
+    except Exception:
+        wb.close()
+        raise
+
+    def rows():
+        try:
+            yield from ws.iter_rows(min_row=1, values_only=True)
+        finally:
+            wb.close()
+
+    return rows()
+
+
+def _read_rows(filepath):
+    """
+    Open the store sheet and return a closable iterator over its rows,
+    preferring the Rust-backed calamine reader.
+    """
+    if CalamineWorkbook is not None:
+        try:
+            return _iter_rows_calamine(filepath)
+        except Exception:
+            pass  # fall back to openpyxl
+    return _iter_rows_openpyxl(filepath)
+
+
 def load_existing_excel(filepath):
     """
     Load stores from an existing Excel file.
     Tries to auto-detect columns by header names (case-insensitive).
+    Rows are iterated without building a Python list of them (calamine still
+    loads the sheet range natively; the openpyxl fallback streams from disk).
     Returns (list_of_store_dicts, set_of_dedup_keys).
     """
     stores = []
     seen_keys = set()
 
     try:
-        wb = load_workbook(filepath, read_only=True, data_only=True)
+        rows = _read_rows(filepath)
     except Exception as e:
         return [], set(), f"Could not open file: {e}"
 
-    # Try the first sheet, or one named with "store" in it
-    ws = None
-    for name in wb.sheetnames:
-        if "store" in name.lower() or "all" in name.lower():
-            ws = wb[name]
-            break
-    if ws is None:
-        ws = wb[wb.sheetnames[0]]
-
-    # Read headers from row 1 or row 2 (some files have a title row)
-    rows = list(ws.iter_rows(min_row=1, values_only=True))
-    if not rows:
-        wb.close()
-        return [], set(), "File is empty"
-
-    # Find the header row (look for a row containing "name" or "store name")
-    header_row_idx = None
-    headers = []
-    for idx, row in enumerate(rows[:5]):  # Check first 5 rows
-        row_lower = [str(c).lower().strip() if c else "" for c in row]
-        if any("name" in h for h in row_lower):
-            header_row_idx = idx
-            headers = row_lower
-            break
+    with closing(rows):
+        # Find the header row (look for a row containing "name" or "store name")
+        # among the first 5; some files have a title row above it. Stopping at
+        # the header leaves `rows` positioned on the first data row.
+        headers = None
+        scanned = 0
+        for row in islice(rows, 5):
+            scanned += 1
+            row_lower = [str(c).lower().strip() if c else "" for c in row]
+            if any("name" in h for h in row_lower):
+                headers = row_lower
+                break
 
-    if header_row_idx is None:
-        wb.close()
-        return [], set(), "Could not find header row (looking for a column containing 'name')"
-
-    # Map column names to indices
-    col_map = {}
-    name_aliases = {
-        "name": ["store name", "name", "shop name", "business name", "store"],
-        "address": ["address", "formatted address", "location", "full address"],
-        "phone": ["phone", "phone number", "telephone", "tel", "phone no", "contact"],
-        "rating": ["rating", "stars", "google rating"],
-        "total_reviews": ["reviews", "total reviews", "review count", "no of reviews", "ratings count"],
-        "category": ["category", "type", "primary type", "business type", "store type"],
-        "website": ["website", "web", "url", "site", "website url"],
-        "opening_hours": ["opening hours", "hours", "open hours", "timings"],
-        "postcode": ["postcode", "postcode area", "post code", "zip", "outcode"],
-        "latitude": ["latitude", "lat"],
-        "longitude": ["longitude", "lng", "lon", "long"],
-        "google_maps_url": ["google maps url", "google maps", "maps url", "maps link", "google maps link"],
-    }
+        if not scanned:
+            return [], set(), "File is empty"
+        if headers is None:
+            return [], set(), "Could not find header row (looking for a column containing 'name')"
 
-    for field, aliases in name_aliases.items():
+        # Map column names to indices: exact header matches first, then
+        # substring matches for any field still unmapped
+        col_map = {}
         for i, h in enumerate(headers):
-            if any(alias == h or alias in h for alias in aliases):
+            field = _ALIAS_TO_FIELD.get(h)
+            if field is not None and field not in col_map:
                 col_map[field] = i
-                break
-
-    if "name" not in col_map:
-        wb.close()
-        return [], set(), "Could not find a 'Store Name' or 'Name' column"
-
-    # Parse data rows
-    data_rows = rows[header_row_idx + 1:]
-    for row in data_rows:
-        if not row or all(c is None or str(c).strip() == "" for c in row):
-            continue
 
-        def get_val(field, default="N/A"):
-            idx = col_map.get(field)
-            if idx is not None and idx < len(row) and row[idx] is not None:
-                val = str(row[idx]).strip()
-                return val if val else default
-            return default
+        for field, aliases in _HEADER_ALIASES.items():
+            if field in col_map:
+                continue
+            for i, h in enumerate(headers):
+                if any(alias in h for alias in aliases):
+                    col_map[field] = i
+                    break
+
+        if "name" not in col_map:
+            return [], set(), "Could not find a 'Store Name' or 'Name' column"
+
+        # Column index, decoder and default for every mapped field, resolved once
+        base_store = {field: default for field, _, default in _STORE_FIELDS}
+        base_store["_source"] = "existing"
+        fields_spec = [
+            (field, col_map[field], kind, default)
+            for field, kind, default in _STORE_FIELDS
+            if field != "name" and field in col_map
+        ]
+        name_idx = col_map["name"]
+
+        # Parse data rows
+        for row in rows:
+            # Skip blank rows; stops at the first populated cell
+            for c in row:
+                if c is not None and (not isinstance(c, str) or c.strip()):
+                    break
+            else:
+                continue
 
-        def get_num(field, default="N/A"):
-            idx = col_map.get(field)
-            if idx is not None and idx < len(row) and row[idx] is not None:
-                try:
-                    return float(row[idx])
-                except (ValueError, TypeError):
-                    return default
-            return default
-
-        def get_int(field, default=0):
-            idx = col_map.get(field)
-            if idx is not None and idx < len(row) and row[idx] is not None:
-                try:
-                    return int(float(row[idx]))
-                except (ValueError, TypeError):
-                    return default
-            return default
+            row_len = len(row)
+            name_val = _decode_cell(row[name_idx], "str", "") if name_idx < row_len else ""
+            if not name_val or name_val == "N/A":
+                continue
 
-        name_val = get_val("name", "")
-        if not name_val or name_val == "N/A":
-            continue
+            store = base_store.copy()
+            store["name"] = name_val
+            for field, idx, kind, default in fields_spec:
+                if idx < row_len:
+                    store[field] = _decode_cell(row[idx], kind, default)
 
-        store = {
-            "name": name_val,
-            "address": get_val("address"),
-            "phone": get_val("phone"),
-            "rating": get_num("rating"),
-            "total_reviews": get_int("total_reviews"),
-            "category": get_val("category"),
-            "website": get_val("website"),
-            "opening_hours": get_val("opening_hours"),
-            "postcode": get_val("postcode", "—"),
-            "latitude": get_val("latitude", ""),
-            "longitude": get_val("longitude", ""),
-            "google_maps_url": get_val("google_maps_url"),
-            "_source": "existing",
-        }
-
-        key = make_dedup_key_from_store(store)
-        if key not in seen_keys and key != "|":
-            seen_keys.add(key)
-            stores.append(store)
+            key = store["_dedup_key"] = make_dedup_key_from_store(store)
+            if key not in seen_keys and key != "|":
+                seen_keys.add(key)
+                stores.append(store)
 
-    wb.close()
-    return stores, seen_keys, None
+        return stores, seen_keys, None
 
 
 # ──────────────────────────────────────────────────────
@@ -176,13 +253,26 @@ def accept_cookies(page):
             btn = page.locator(f'button:has-text("{btn_text}")').first
             if btn.is_visible(timeout=2000):
                 btn.click()
-                page.wait_for_timeout(1000)
+                page.wait_for_load_state("domcontentloaded")
                 return True
         except Exception:
             continue
     return False
 
 
+# [number of listings in the feed, whether the end-of-list marker is shown]
+_FEED_STATE_JS = '''
+    ([feedSel, itemSel]) => {
+        const feed = document.querySelector(feedSel);
+        const text = feed ? feed.innerText.toLowerCase() : '';
+        return [
+            document.querySelectorAll(itemSel).length,
+            text.includes("you've reached the end of the list"),
+        ];
+    }
+'''
+
+
 def scroll_results(page):
     feed_selector = 'div[role="feed"]'
     try:
@@ -190,6 +280,7 @@ def scroll_results(page):
     except PWTimeout:
         return
 
+    item_selector = f'{feed_selector} > div > div > a[href*="/maps/place/"]'
     prev_count = 0
     stale_rounds = 0
 
@@ -198,17 +289,19 @@ def scroll_results(page):
             const feed = document.querySelector('{feed_selector}');
             if (feed) feed.scrollTop = feed.scrollHeight;
         ''')
-        page.wait_for_timeout(int(SCROLL_PAUSE * 1000))
-
+        # Returns as soon as the feed grows; SCROLL_PAUSE is only the cap
         try:
-            end_text = page.locator("text=You've reached the end of the list").first
-            if end_text.is_visible(timeout=500):
-                break
-        except Exception:
+            page.wait_for_function(
+                "([sel, n]) => document.querySelectorAll(sel).length > n",
+                arg=[item_selector, prev_count],
+                timeout=int(SCROLL_PAUSE * 1000),
+            )
+        except PWTimeout:
             pass
 
-        items = page.locator(f'{feed_selector} > div > div > a[href*="/maps/place/"]')
-        current_count = items.count()
+        current_count, reached_end = page.evaluate(_FEED_STATE_JS, [feed_selector, item_selector])
+        if reached_end:
+            break
 
         if current_count == prev_count:
             stale_rounds += 1
@@ -231,104 +324,117 @@ def extract_listing_links(page):
         }
     ''')
 
+# Patterns used once per listing in extract_place_details
+_RE_STARS = re.compile(r'([\d.]+)\s*star')
+_RE_REVIEWS = re.compile(r'([\d,]+)\s*review')
+_RE_DAYS_SPLIT = re.compile(r'(?=Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)')
+_RE_COORDS = re.compile(r'@(-?[\d.]+),(-?[\d.]+)')
+
+
+# Reads every field extract_place_details needs in a single round-trip.
+# Mirrors Playwright's locator(...).first.is_visible(): only the first match
+# of each selector counts, and only if it is rendered.
+_PLACE_DETAILS_JS = '''
+    () => {
+        const first = (sel) => {
+            const el = document.querySelector(sel);
+            return el && el.getClientRects().length ? el : null;
+        };
+        const text = (el) => el ? el.innerText.trim() : null;
+        const aria = (el) => el ? el.getAttribute('aria-label') : null;
+
+        const reviews = first('button[aria-label*="reviews"]');
+        const items = [];
+        for (const el of document.querySelectorAll('button[data-item-id], a[data-item-id]')) {
+            items.push({
+                dataId: el.getAttribute('data-item-id') || '',
+                aria: el.getAttribute('aria-label') || '',
+                text: el.innerText.trim(),
+                href: el.getAttribute('href'),
+            });
+        }
+        return {
+            name: text(first('h1')),
+            ratingLabel: aria(first('div[role="img"][aria-label*="stars"]')),
+            reviewsLabel: reviews ? (aria(reviews) || reviews.innerText) : null,
+            category: text(first('button[jsaction*="category"]')),
+            items: items,
+            phoneLabel: aria(first('button[aria-label*="Phone:"]')),
+            hoursLabel: aria(first(
+                'div[aria-label*="Monday"], div[aria-label*="Sunday"], ' +
+                'button[aria-label*="hours"], div[aria-label*="hour"]'
+            )),
+        };
+    }
+'''
+
 
 def extract_place_details(page):
+    url = page.url
     store = {
         "name": "N/A", "address": "N/A", "phone": "N/A",
         "website": "N/A", "rating": "N/A", "total_reviews": 0,
         "category": "N/A", "opening_hours": "N/A",
-        "latitude": "", "longitude": "", "google_maps_url": page.url,
+        "latitude": "", "longitude": "", "google_maps_url": url,
     }
 
     try:
-        name_el = page.locator('h1').first
-        if name_el.is_visible(timeout=3000):
-            store["name"] = name_el.inner_text().strip()
-    except Exception:
-        pass
-
-    try:
-        rating_el = page.locator('div[role="img"][aria-label*="stars"]').first
-        if rating_el.is_visible(timeout=1000):
-            label = rating_el.get_attribute("aria-label") or ""
-            match = re.search(r'([\d.]+)\s*star', label)
-            if match:
-                store["rating"] = float(match.group(1))
-    except Exception:
-        pass
-
-    try:
-        review_el = page.locator('button[aria-label*="reviews"]').first
-        if review_el.is_visible(timeout=1000):
-            label = review_el.get_attribute("aria-label") or review_el.inner_text()
-            match = re.search(r'([\d,]+)\s*review', label)
-            if match:
-                store["total_reviews"] = int(match.group(1).replace(",", ""))
-    except Exception:
-        pass
-
-    try:
-        cat_el = page.locator('button[jsaction*="category"]').first
-        if cat_el.is_visible(timeout=1000):
-            store["category"] = cat_el.inner_text().strip()
+        details = page.evaluate(_PLACE_DETAILS_JS)
     except Exception:
-        pass
+        details = {}
 
-    try:
-        info_items = page.locator('button[data-item-id], a[data-item-id]')
-        count = info_items.count()
-        for idx in range(count):
-            item = info_items.nth(idx)
-            try:
-                data_id = item.get_attribute("data-item-id") or ""
-                aria = item.get_attribute("aria-label") or ""
-                text = item.inner_text().strip() if not aria else aria
-
-                if data_id.startswith("address"):
-                    store["address"] = text.replace("Address: ", "")
-                elif data_id.startswith("phone"):
-                    store["phone"] = text.replace("Phone: ", "")
-                elif data_id.startswith("authority"):
-                    website = item.get_attribute("href") or text.replace("Website: ", "")
-                    store["website"] = website
-            except Exception:
-                continue
-    except Exception:
-        pass
+    if details.get("name"):
+        store["name"] = details["name"]
 
-    if store["phone"] == "N/A":
+    match = _RE_STARS.search(details.get("ratingLabel") or "")
+    if match:
         try:
-            phone_btn = page.locator('button[aria-label*="Phone:"]').first
-            if phone_btn.is_visible(timeout=500):
-                label = phone_btn.get_attribute("aria-label") or ""
-                store["phone"] = label.replace("Phone: ", "").strip()
-        except Exception:
+            store["rating"] = float(match.group(1))
+        except ValueError:
             pass
 
-    try:
-        hours_el = page.locator(
-            'div[aria-label*="Monday"], div[aria-label*="Sunday"], '
-            'button[aria-label*="hours"], div[aria-label*="hour"]'
-        ).first
-        if hours_el.is_visible(timeout=1000):
-            aria = hours_el.get_attribute("aria-label") or ""
-            if aria:
-                hours_text = aria.replace("Hours ", "").replace(". Hide open hours for the week", "")
-                days = re.split(r'(?=Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', hours_text)
-                days = [d.strip().rstrip(";., ") for d in days if d.strip()]
-                if days:
-                    store["opening_hours"] = "\n".join(days)
-    except Exception:
-        pass
+    match = _RE_REVIEWS.search(details.get("reviewsLabel") or "")
+    if match:
+        try:
+            store["total_reviews"] = int(match.group(1).replace(",", ""))
+        except ValueError:
+            pass
 
-    try:
-        coord_match = re.search(r'@(-?[\d.]+),(-?[\d.]+)', page.url)
-        if coord_match:
+    if details.get("category"):
+        store["category"] = details["category"]
+
+    for item in details.get("items") or ():
+        data_id = item["dataId"]
+        text = item["aria"] or item["text"]
+
+        if data_id.startswith("address"):
+            store["address"] = text.replace("Address: ", "")
+        elif data_id.startswith("phone"):
+            store["phone"] = text.replace("Phone: ", "")
+        elif data_id.startswith("authority"):
+            store["website"] = item["href"] or text.replace("Website: ", "")
+
+    if store["phone"] == "N/A" and details.get("phoneLabel"):
+        store["phone"] = details["phoneLabel"].replace("Phone: ", "").strip()
+
+    aria = details.get("hoursLabel")
+    if aria:
+        hours_text = aria.replace("Hours ", "").replace(". Hide open hours for the week", "")
+        days = _RE_DAYS_SPLIT.split(hours_text)
+        days = [d.strip().rstrip(";., ") for d in days if d.strip()]
+        if days:
+            store["opening_hours"] = "\n".join(days)
+
+    coord_match = _RE_COORDS.search(url)
+    if coord_match:
+        try:
             store["latitude"] = float(coord_match.group(1))
             store["longitude"] = float(coord_match.group(2))
-    except Exception:
-        pass
+        except ValueError:
+            pass
 
+    # Computed once here so dedup checks are a plain lookup
+    store["_dedup_key"] = make_dedup_key(store["name"], store["address"])
     return store
 
 
@@ -336,9 +442,12 @@ def scrape_postcode(page, query, postcode, location):
     url = build_url(query, postcode, location)
     try:
         page.goto(url, wait_until="domcontentloaded", timeout=20000)
-        page.wait_for_timeout(2500)
     except Exception:
         return []
+    try:
+        page.wait_for_selector('h1, div[role="feed"]', timeout=5000)
+    except PWTimeout:
+        pass
 
     scroll_results(page)
     links = extract_listing_links(page)
@@ -360,7 +469,10 @@ def scrape_postcode(page, query, postcode, location):
     for link in links:
         try:
             page.goto(link, wait_until="domcontentloaded", timeout=15000)
-            page.wait_for_timeout(int(DETAIL_PAUSE * 1000))
+            try:
+                page.wait_for_selector('h1', state="visible", timeout=int(DETAIL_TIMEOUT * 1000))
+            except PWTimeout:
+                pass
             store = extract_place_details(page)
             store["google_maps_url"] = link
             stores.append(store)
@@ -370,71 +482,142 @@ def scrape_postcode(page, query, postcode, location):
     return stores
 
 
+# Only DOM text and attributes are read, so none of these are worth fetching
+_BLOCKED_RESOURCES = frozenset({"image", "font", "media", "stylesheet"})
+
+
+def _block_heavy_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+def _open_context(browser):
+    """New browser context with Google Maps loaded and cookies accepted."""
+    context = browser.new_context(
+        user_agent=(
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+        ),
+        viewport={"width": 1280, "height": 900},
+        locale="en-GB",
+    )
+    # Browsers outlive jobs, so a half-opened context must not be left behind
+    try:
+        page = context.new_page()
+
+        page.goto("https://www.google.com/maps", wait_until="domcontentloaded", timeout=20000)
+        # Either the consent wall or the map search box, whichever renders first
+        try:
+            page.wait_for_selector(
+                'button:has-text("Accept all"), button:has-text("Reject all"), #searchboxinput',
+                timeout=5000,
+            )
+        except PWTimeout:
+            pass
+        accept_cookies(page)
+        # Installed after the consent wall so it still renders with its styles
+        context.route("**/*", _block_heavy_resources)
+    except Exception:
+        _close_quietly(context)
+        raise
+    return context, page
+
+
+def _scrape_worker(browser, tasks, stop, query, location, on_result):
+    """
+    Pull postcodes from `tasks` until it is empty, scraping each one in a
+    fresh context on `browser`.
+    If a context cannot be opened the worker stops early, leaving the
+    remaining postcodes to the other workers, and returns that error.
+    """
+    try:
+        context, page = _open_context(browser)
+    except Exception as e:
+        return e
+    try:
+        uses = 0
+        while not stop.is_set():
+            try:
+                postcode = tasks.get_nowait()
+            except queue.Empty:
+                break
+
+            # Recycle the context periodically to keep memory in check
+            if uses >= MAX_USES_PER_CONTEXT:
+                context.close()
+                context = None
+                try:
+                    context, page = _open_context(browser)
+                except Exception as e:
+                    tasks.put(postcode)
+                    return e
+                uses = 0
+
+            stores_in_pc = scrape_postcode(page, query, postcode, location)
+            uses += 1
+            on_result(postcode, stores_in_pc)
+
+            if not tasks.empty():
+                time.sleep(1)
+    finally:
+        if context is not None:
+            context.close()
+
+
 def scrape_postcodes(query, location, postcodes,
                      existing_keys=None,
-                     progress_callback=None, store_callback=None):
+                     progress_callback=None, store_callback=None,
+                     pool_size=POOL_SIZE):
     """
-    Main entry point. Scrapes Google Maps for each postcode.
-    existing_keys: set of dedup keys from an uploaded file to skip.
+    Main entry point. Scrapes Google Maps for each postcode, running up to
+    pool_size of the shared browser workers in parallel.
+    existing_keys: set/frozenset of dedup keys from an uploaded file to skip (not modified).
     Returns (new_results, postcode_summary).
     """
     if existing_keys is None:
-        existing_keys = set()
+        existing_keys = frozenset()
 
     def log(msg):
         if progress_callback:
             progress_callback(msg)
 
     new_results = []
-    seen_keys = set(existing_keys)  # Start with existing keys so we skip duplicates
+    seen_keys = set()  # Keys scraped this run; existing_keys is checked separately, not copied
     postcode_summary = {}
-
-    with sync_playwright() as p:
-        log("Launching browser...")
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"],
-        )
-        context = browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-            ),
-            viewport={"width": 1280, "height": 900},
-            locale="en-GB",
-        )
-        page = context.new_page()
-
-        page.goto("https://www.google.com/maps", wait_until="domcontentloaded", timeout=20000)
-        page.wait_for_timeout(2000)
-        accept_cookies(page)
-        page.wait_for_timeout(1000)
-
-        for pc_idx, postcode in enumerate(postcodes):
-            log(f"[{pc_idx+1}/{len(postcodes)}] Scraping postcode: {postcode}")
-
-            stores_in_pc = scrape_postcode(page, query, postcode, location)
+    total = len(postcodes)
+    done = 0
+    lock = threading.Lock()  # guards seen_keys/new_results/postcode_summary/done
+
+    def on_result(postcode, stores_in_pc):
+        nonlocal done
+        with lock:
+            done += 1
             new_count = 0
             skipped = 0
             phone_count = 0
             ratings = []
+            seen_add = seen_keys.add
+            results_append = new_results.append
 
             for store in stores_in_pc:
-                key = make_dedup_key_from_store(store)
-                if key in seen_keys:
+                key = store["_dedup_key"]
+                if key in existing_keys or key in seen_keys:
                     skipped += 1
                     continue
 
-                seen_keys.add(key)
+                seen_add(key)
                 store["postcode"] = postcode
                 store["_source"] = "new"
-                new_results.append(store)
+                results_append(store)
                 new_count += 1
 
                 if store["phone"] != "N/A":
                     phone_count += 1
-                if store["rating"] != "N/A":
-                    ratings.append(store["rating"])
+                rating = store["rating"]
+                if rating != "N/A":
+                    ratings.append(rating)
 
                 if store_callback:
                     store_callback(store)
@@ -448,28 +631,229 @@ def scrape_postcodes(query, location, postcodes,
 
             skip_msg = f", {skipped} already in sheet" if skipped > 0 else ""
             log(
-                f"[{pc_idx+1}/{len(postcodes)}] {postcode}: "
+                f"[{done}/{total}] {postcode}: "
                 f"{len(stores_in_pc)} found, {new_count} new{skip_msg} — "
                 f"Total new: {len(new_results)}"
             )
 
-            if pc_idx < len(postcodes) - 1:
-                time.sleep(1)
+    tasks = queue.Queue()
+    for postcode in postcodes:
+        tasks.put(postcode)
+    stop = threading.Event()
+    num_workers = max(1, min(pool_size, POOL_SIZE, total))
+
+    _ensure_pool()
+    log(f"Scraping with {num_workers} browser{'s' if num_workers > 1 else ''}...")
+    futures = []
+    for _ in range(num_workers):
+        future = Future()
+        _pool_jobs.put((future, (tasks, stop, query, location, on_result)))
+        futures.append(future)
+    open_errors = []
+    try:
+        for future in as_completed(futures):
+            error = future.result()
+            if error is not None:
+                open_errors.append(error)
+                log(f"A browser could not load Google Maps ({error}); continuing with the others")
+    except Exception:
+        stop.set()  # let the remaining workers finish their current postcode and exit
+        wait(futures)
+        raise
 
-        browser.close()
+    # Only fail the job if no worker was left to scrape some of the postcodes
+    with lock:
+        finished = done
+    if finished < total:
+        raise open_errors[-1]
 
     return new_results, postcode_summary
 
 
+# ──────────────────────────────────────────────────────
+# BROWSER POOL
+# ──────────────────────────────────────────────────────
+
+_pool_jobs = queue.Queue()   # (future, _scrape_worker args), or None to stop a worker
+_pool_threads = []
+_pool_lock = threading.Lock()
+
+
+def _launch_browser(playwright):
+    return playwright.chromium.launch(
+        headless=True,
+        args=[
+            "--disable-blink-features=AutomationControlled",
+            "--disable-features=ServiceWorker",
+        ],
+    )
+
+
+def _close_quietly(resource):
+    try:
+        resource.close()
+    except Exception:
+        pass
+
+
+def _browser_worker():
+    """
+    Long-lived pool thread. Playwright's sync objects are bound to the thread
+    that created them, so each worker starts its own Playwright and browser on
+    first use and keeps them across scrape jobs, relaunching the browser after
+    MAX_JOBS_PER_BROWSER jobs or if it has died.
+    """
+    playwright = browser = None
+    jobs = 0
+    try:
+        while True:
+            job = _pool_jobs.get()
+            if job is None:
+                return
+            future, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                if browser is not None and (jobs >= MAX_JOBS_PER_BROWSER or not browser.is_connected()):
+                    _close_quietly(browser)
+                    browser = None
+                if browser is None:
+                    if playwright is None:
+                        playwright = sync_playwright().start()
+                    browser = _launch_browser(playwright)
+                    jobs = 0
+                jobs += 1
+                result = _scrape_worker(browser, *args)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+    finally:
+        if browser is not None:
+            _close_quietly(browser)
+        if playwright is not None:
+            playwright.stop()
+
+
+def _ensure_pool():
+    with _pool_lock:
+        if _pool_threads:
+            return
+        for _ in range(POOL_SIZE):
+            thread = threading.Thread(target=_browser_worker, daemon=True)
+            thread.start()
+            _pool_threads.append(thread)
+        atexit.register(_shutdown_pool)
+
+
+def _shutdown_pool():
+    """Ask every pool worker to close its browser, then wait briefly for them."""
+    for _ in _pool_threads:
+        _pool_jobs.put(None)
+    for thread in _pool_threads:
+        thread.join(timeout=10)
+
+
 # ──────────────────────────────────────────────────────
 # EXCEL EXPORT (supports merging existing + new)
 # ──────────────────────────────────────────────────────
 
+# Shared styles — openpyxl dedups these into the workbook's style table
+TITLE_FONT = Font(name="Arial", bold=True, size=14, color="FFFFFF")
+TITLE_FILL = PatternFill("solid", fgColor="1F4E79")
+TITLE_ALIGN = Alignment(horizontal="center", vertical="center")
+HEADER_FONT = Font(name="Arial", bold=True, size=10, color="FFFFFF")
+HEADER_FILL = PatternFill("solid", fgColor="2F5496")
+HEADER_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
+DATA_FONT = Font(name="Arial", size=10)
+BOLD_FONT = Font(name="Arial", bold=True, size=10)
+DATA_ALIGN = Alignment(vertical="top", wrap_text=True)
+CENTER_ALIGN = Alignment(horizontal="center", vertical="top", wrap_text=True)
+ALT_FILL = PatternFill("solid", fgColor="F2F7FC")
+THIN_BORDER = Border(
+    left=Side(style="thin", color="D9D9D9"),
+    right=Side(style="thin", color="D9D9D9"),
+    top=Side(style="thin", color="D9D9D9"),
+    bottom=Side(style="thin", color="D9D9D9"),
+)
+LINK_FONT = Font(name="Arial", size=10, color="0563C1", underline="single")
+PC_FILL = PatternFill("solid", fgColor="D6E4F0")
+NEW_FILL = PatternFill("solid", fgColor="E8F5E9")       # Light green for new stores
+EXISTING_FILL = PatternFill("solid", fgColor="FFF8E1")  # Light yellow for existing
+NEW_SOURCE_FONT = Font(name="Arial", bold=True, size=10, color="2E7D32")
+EXISTING_SOURCE_FONT = Font(name="Arial", size=10, color="F57F17")
+GREEN_FILL = PatternFill("solid", fgColor="E2EFDA")
+ZERO_FILL = PatternFill("solid", fgColor="FCE4EC")
+
+# (header, width, centered) for each column of the "All Stores" sheet
+STORE_COLUMNS = (
+    ("#", 5, True), ("Source", 10, True), ("Postcode", 12, True),
+    ("Store Name", 30, False), ("Address", 42, False),
+    ("Phone Number", 20, True), ("Rating", 8, True),
+    ("Reviews", 10, True), ("Category", 22, False), ("Website", 35, False),
+    ("Opening Hours", 40, False), ("Latitude", 12, True),
+    ("Longitude", 12, True), ("Google Maps URL", 40, False),
+)
+_STORE_COL_LETTERS = tuple(get_column_letter(i) for i in range(1, len(STORE_COLUMNS) + 1))
+_STORE_COL_ALIGNS = tuple(
+    CENTER_ALIGN if centered else DATA_ALIGN for _, _, centered in STORE_COLUMNS
+)
+# Source and Postcode carry their own fills; every other column alternates
+_USES_ROW_FILL = tuple(name not in ("Source", "Postcode") for name, _, _ in STORE_COLUMNS)
+
+
+def _styled_cell(ws, value, font=DATA_FONT, fill=None, alignment=None, border=None):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if alignment is not None:
+        cell.alignment = alignment
+    if border is not None:
+        cell.border = border
+    return cell
+
+
+def _cell_maker(ws):
+    """
+    Return make(value, font, fill, alignment, border) -> WriteOnlyCell.
+    Each distinct style combination is resolved against the workbook's style
+    tables once; every later cell with that combination copies the cached
+    style array instead of assigning four style objects.
+    """
+    templates = {}
+
+    def make(value, font=DATA_FONT, fill=None, alignment=None, border=None):
+        key = (font, fill, alignment, border)
+        style = templates.get(key)
+        if style is None:
+            style = templates[key] = _styled_cell(ws, None, font, fill, alignment, border)._style
+        cell = WriteOnlyCell(ws, value=value)
+        cell._style = copy(style)
+        return cell
+
+    return make
+
+
+def _title_row(ws, text):
+    return [_styled_cell(ws, text, font=TITLE_FONT, fill=TITLE_FILL, alignment=TITLE_ALIGN)]
+
+
+def _header_row(ws, headers):
+    return [
+        _styled_cell(ws, h, font=HEADER_FONT, fill=HEADER_FILL,
+                     alignment=HEADER_ALIGN, border=THIN_BORDER)
+        for h in headers
+    ]
+
+
 def create_excel(all_results, postcode_summary, output_path, query,
                  existing_stores=None):
     """
     Create formatted Excel. If existing_stores is provided, they are
     included in the sheet above the new results, clearly labelled.
+    Uses a write-only workbook so rows are streamed to disk as they are added.
     """
     if existing_stores is None:
         existing_stores = []
@@ -486,63 +870,32 @@ def create_excel(all_results, postcode_summary, output_path, query,
     # Sort by postcode then name
     combined.sort(key=lambda x: (x.get("postcode", "ZZZ"), x.get("name", "")))
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "All Stores"
-
-    title_font = Font(name="Arial", bold=True, size=14, color="FFFFFF")
-    title_fill = PatternFill("solid", fgColor="1F4E79")
-    header_font = Font(name="Arial", bold=True, size=10, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="2F5496")
-    header_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    data_font = Font(name="Arial", size=10)
-    data_align = Alignment(vertical="top", wrap_text=True)
-    center_align = Alignment(horizontal="center", vertical="top", wrap_text=True)
-    alt_fill = PatternFill("solid", fgColor="F2F7FC")
-    thin_border = Border(
-        left=Side(style="thin", color="D9D9D9"),
-        right=Side(style="thin", color="D9D9D9"),
-        top=Side(style="thin", color="D9D9D9"),
-        bottom=Side(style="thin", color="D9D9D9"),
-    )
-    link_font = Font(name="Arial", size=10, color="0563C1", underline="single")
-    pc_fill = PatternFill("solid", fgColor="D6E4F0")
-    new_fill = PatternFill("solid", fgColor="E8F5E9")     # Light green for new stores
-    existing_fill = PatternFill("solid", fgColor="FFF8E1") # Light yellow for existing
-
-    columns = [
-        ("#", 5, True), ("Source", 10, True), ("Postcode", 12, True),
-        ("Store Name", 30, False), ("Address", 42, False),
-        ("Phone Number", 20, True), ("Rating", 8, True),
-        ("Reviews", 10, True), ("Category", 22, False), ("Website", 35, False),
-        ("Opening Hours", 40, False), ("Latitude", 12, True),
-        ("Longitude", 12, True), ("Google Maps URL", 40, False),
-    ]
-    num_cols = len(columns)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("All Stores")
+
+    columns = STORE_COLUMNS
+    last_col = _STORE_COL_LETTERS[-1]
+
+    # Dimensions, merges, panes and filters must be set before rows are written
+    for letter, (_, width, _) in zip(_STORE_COL_LETTERS, columns):
+        ws.column_dimensions[letter].width = width
+    ws.row_dimensions[1].height = 30
+    ws.merged_cells.ranges.add(f"A1:{last_col}1")
+    ws.freeze_panes = "A3"
+    ws.auto_filter.ref = f"A2:{last_col}{len(combined) + 2}"
 
     # Title
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=num_cols)
     title_text = f'"{query}" — {datetime.now().strftime("%d %b %Y %H:%M")}'
     if existing_stores:
         title_text += f'  |  {len(existing_stores)} existing + {len(all_results)} new'
-    ws["A1"].value = title_text
-    ws["A1"].font = title_font
-    ws["A1"].fill = title_fill
-    ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[1].height = 30
+    ws.append(_title_row(ws, title_text))
 
     # Headers
-    for col_idx, (header, width, _) in enumerate(columns, 1):
-        cell = ws.cell(row=2, column=col_idx, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-        cell.border = thin_border
-        ws.column_dimensions[get_column_letter(col_idx)].width = width
+    ws.append(_header_row(ws, [c[0] for c in columns]))
 
     # Data
+    make_cell = _cell_maker(ws)
     for i, store in enumerate(combined):
-        row = i + 3
         source = store.get("_source", "new")
         source_label = "Existing" if source == "existing" else "★ New"
 
@@ -556,77 +909,64 @@ def create_excel(all_results, postcode_summary, output_path, query,
             store.get("google_maps_url", "N/A"),
         ]
 
-        row_fill = new_fill if source == "new" else existing_fill
-
-        for col_idx, val in enumerate(values, 1):
-            cell = ws.cell(row=row, column=col_idx, value=val)
-            cell.font = data_font
-            cell.border = thin_border
-            cell.alignment = center_align if columns[col_idx - 1][2] else data_align
+        row_fill = ALT_FILL if i & 1 else None
+        cells = []
+        for col_idx, (val, alignment, uses_row_fill) in enumerate(
+                zip(values, _STORE_COL_ALIGNS, _USES_ROW_FILL), 1):
+            font = DATA_FONT
+            fill = row_fill if uses_row_fill else None
 
             # Source column styling
             if col_idx == 2:
                 if source == "new":
-                    cell.font = Font(name="Arial", bold=True, size=10, color="2E7D32")
-                    cell.fill = new_fill
+                    font, fill = NEW_SOURCE_FONT, NEW_FILL
                 else:
-                    cell.font = Font(name="Arial", size=10, color="F57F17")
-                    cell.fill = existing_fill
+                    font, fill = EXISTING_SOURCE_FONT, EXISTING_FILL
             elif col_idx == 3:
-                cell.fill = pc_fill
-                cell.font = Font(name="Arial", bold=True, size=10)
-            else:
-                if i % 2 == 1:
-                    cell.fill = alt_fill
+                font, fill = BOLD_FONT, PC_FILL
+
+            is_link = col_idx in (10, 14) and val and val != "N/A"
+            if is_link:
+                font = LINK_FONT
 
-            if col_idx in (10, 14) and val and val != "N/A":
-                cell.font = link_font
+            cell = make_cell(
+                val, font=font, fill=fill, border=THIN_BORDER,
+                alignment=alignment,
+            )
+            if is_link:
                 try:
                     cell.hyperlink = val
                 except Exception:
                     pass
+            cells.append(cell)
 
-    ws.freeze_panes = "A3"
-    ws.auto_filter.ref = f"A2:{get_column_letter(num_cols)}{len(combined) + 2}"
+        ws.append(cells)
 
     # ── Postcode Summary sheet ──
     ws2 = wb.create_sheet("Postcode Summary")
-    ws2.merge_cells("A1:D1")
-    ws2["A1"].value = "Results by Postcode (New stores only)"
-    ws2["A1"].font = title_font
-    ws2["A1"].fill = title_fill
-    ws2["A1"].alignment = Alignment(horizontal="center", vertical="center")
-
-    for col_idx, header in enumerate(["Postcode", "New Stores", "With Phone", "Avg Rating"], 1):
-        cell = ws2.cell(row=2, column=col_idx, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_align
-        cell.border = thin_border
-
     ws2.column_dimensions["A"].width = 12
     ws2.column_dimensions["B"].width = 14
     ws2.column_dimensions["C"].width = 14
     ws2.column_dimensions["D"].width = 12
+    ws2.merged_cells.ranges.add("A1:D1")
 
-    green_fill = PatternFill("solid", fgColor="E2EFDA")
-    zero_fill = PatternFill("solid", fgColor="FCE4EC")
+    ws2.append(_title_row(ws2, "Results by Postcode (New stores only)"))
+    ws2.append(_header_row(ws2, ["Postcode", "New Stores", "With Phone", "Avg Rating"]))
 
+    make_cell = _cell_maker(ws2)
+    summary_fonts = (BOLD_FONT, DATA_FONT, DATA_FONT, DATA_FONT)
     for i, (pc, info) in enumerate(sorted(postcode_summary.items())):
-        row = i + 3
-        ws2.cell(row=row, column=1, value=pc).font = Font(name="Arial", bold=True, size=10)
-        ws2.cell(row=row, column=2, value=info["count"]).font = data_font
-        ws2.cell(row=row, column=3, value=info["phone_count"]).font = data_font
-        ws2.cell(row=row, column=4,
-                 value=round(info["avg_rating"], 1) if info["avg_rating"] else "—").font = data_font
-        for col in range(1, 5):
-            cell = ws2.cell(row=row, column=col)
-            cell.border = thin_border
-            cell.alignment = center_align
-            cell.fill = (green_fill if i % 2 == 0 else alt_fill) if info["count"] > 0 else zero_fill
+        fill = (ALT_FILL if i & 1 else GREEN_FILL) if info["count"] > 0 else ZERO_FILL
+        avg = round(info["avg_rating"], 1) if info["avg_rating"] else "—"
+        ws2.append([
+            make_cell(val, font=font, fill=fill, alignment=CENTER_ALIGN, border=THIN_BORDER)
+            for val, font in zip((pc, info["count"], info["phone_count"], avg), summary_fonts)
+        ])
 
     # ── Info sheet ──
     ws3 = wb.create_sheet("Scrape Info")
+    ws3.column_dimensions["A"].width = 25
+    ws3.column_dimensions["B"].width = 55
     info_data = [
         ("Search Query", query),
         ("Date Scraped", datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
@@ -637,10 +977,8 @@ def create_excel(all_results, postcode_summary, output_path, query,
         ("Total Stores in File", len(combined)),
         ("Duplicates Skipped", "Auto-deduplicated by name + address"),
     ]
-    for r, (label, val) in enumerate(info_data, 1):
-        ws3.cell(row=r, column=1, value=label).font = Font(name="Arial", bold=True, size=10)
-        ws3.cell(row=r, column=2, value=val).font = Font(name="Arial", size=10)
-    ws3.column_dimensions["A"].width = 25
-    ws3.column_dimensions["B"].width = 55
+    make_cell = _cell_maker(ws3)
+    for label, val in info_data:
+        ws3.append([make_cell(label, font=BOLD_FONT), make_cell(val)])
 
     wb.save(output_path)